@@ -1,179 +1,389 @@
-import re
-import json
+import os
+try:
+    # The third-party regex module has a faster backtracking engine and is a
+    # drop-in replacement for the re features used here.
+    import regex as re
+except ImportError:
+    import re
+import orjson
 import pickle
 from collections import Counter
+from dataclasses import dataclass, asdict
+from functools import lru_cache
 from datasets import load_dataset
 import unicodedata
 
+@dataclass(slots=True)
+class Token:
+    """A single token and its classified type"""
+    text: str
+    type: str
+
+@dataclass(slots=True)
+class Sentence:
+    """A tokenized sentence; slotted to keep per-sentence memory small"""
+    text: str
+    tokens: list
+
+    @property
+    def words(self):
+        return [token.text for token in self.tokens]
+
+    @property
+    def word_count(self):
+        return len(self.tokens)
+
+# The pattern set is fixed, so everything derived from it is built once at
+# import time and shared by every GujaratiTokenizer instance instead of being
+# recompiled per constructor call.
+
+# Gujarati Unicode ranges
+# Main Gujarati block: U+0A80-U+0AFF
+# This includes base characters, matras, and other diacritical marks
+GUJARATI_CHAR_PATTERN = r'[\u0A80-\u0AFF]'
+
+# Enhanced patterns for different token types
+TOKEN_PATTERNS = {
+    'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    # Scheme- or www-prefixed only: the old bare-domain alternative
+    # matched any dotted token and could backtrack quadratically.
+    'url': r'https?://\S+|www\.\S+',
+    # date must precede number in the alternation so 25/07/2025 is
+    # not eaten piecemeal as numbers
+    'date': r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b|\b\d{4}[/-]\d{1,2}[/-]\d{1,2}\b',
+    # one branch for integers and decimals; classification
+    # disambiguates by the presence of '.'
+    'number': r'\b\d+(?:\.\d+)?\b',
+    'punctuation': r'[।॥.,!?;:"\'()[\]{}\-–—_/\\@#$%^&*+=<>|`~]',
+    # Gujarati word: sequence of Gujarati-block characters
+    # (input is NFC-normalized before tokenization, see
+    # tokenize_paragraph)
+    'gujarati_word': GUJARATI_CHAR_PATTERN + r'+',
+    # English word: sequence of English letters
+    'english_word': r'[A-Za-z]+',
+    # Whitespace
+    'whitespace': r'\s+'
+}
+
+# Combine all patterns for tokenization
+_TOKEN_PATTERN = '|'.join(f'({pattern})' for pattern in TOKEN_PATTERNS.values())
+_COMPILED_TOKEN_PATTERN = re.compile(_TOKEN_PATTERN)
+
+# Group i of the combined pattern corresponds to the i-th pattern above,
+# so the matched group index already identifies the token type.
+_GROUP_TO_TYPE = list(TOKEN_PATTERNS.keys())
+
+# Precompiled patterns for token classification, used with fullmatch so
+# both ends are anchored in C — no \A...\Z wrapping and no partial-match
+# backtracking on the url/email patterns.
+_CLASSIFY_ORDER = [
+    'email', 'url', 'date', 'number',
+    'punctuation', 'gujarati_word', 'english_word'
+]
+_CLASSIFY_COMPILED = {
+    name: re.compile(TOKEN_PATTERNS[name])
+    for name in _CLASSIFY_ORDER
+}
+
+# Punctuation is a fixed character set; a frozenset membership test
+# classifies it without starting the regex engine. The regex form is
+# kept in TOKEN_PATTERNS for the combined token pattern.
+_PUNCT_SET = frozenset('।॥.,!?;:"\'()[]{}-–—_/\\@#$%^&*+=<>|`~')
+
+# Single-character ASCII tokens classify with one table load instead of a
+# regex dispatch; index by code point, 128 entries.
+_ASCII_CLASS = tuple(
+    'integer' if chr(code).isdigit() else
+    'english_word' if chr(code).isalpha() else
+    'punctuation' if chr(code) in _PUNCT_SET else
+    'other'
+    for code in range(128)
+)
+
+# Bare domains (example.com) are classified by TLD suffix rather
+# than by the url regex, which no longer matches them.
+_COMMON_TLDS = frozenset({
+    'com', 'org', 'net', 'edu', 'gov', 'in', 'io', 'co', 'info'
+})
+
+# Sentence boundary patterns for Gujarati
+_SENTENCE_PATTERN = re.compile(r'[।॥.!?]+\s*')
+_SENTENCE_TERMINATORS = frozenset('।॥.!?')
+
 class GujaratiTokenizer:
     def __init__(self):
-        # Gujarati Unicode ranges
-        # Main Gujarati block: U+0A80-U+0AFF
-        # This includes base characters, matras, and other diacritical marks
-        self.gujarati_char_pattern = r'[\u0A80-\u0AFF]'
-        
-        # Enhanced patterns for different token types
-        self.patterns = {
-            'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-            'url': r'https?://[^\s]+|www\.[^\s]+|\b[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}[^\s]*',
-            'decimal_number': r'\b\d+\.\d+\b',
-            'integer': r'\b\d+\b',
-            'date': r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b|\b\d{4}[/-]\d{1,2}[/-]\d{1,2}\b',
-            'punctuation': r'[।॥.,!?;:"\'()[\]{}\-–—_/\\@#$%^&*+=<>|`~]',
-            # Gujarati word: sequence of Gujarati characters (including matras)
-            'gujarati_word': self.gujarati_char_pattern + r'+',
-            # English word: sequence of English letters
-            'english_word': r'[A-Za-z]+',
-            # Whitespace
-            'whitespace': r'\s+'
-        }
-        
-        # Combine all patterns for tokenization
-        self.token_pattern = '|'.join(f'({pattern})' for pattern in self.patterns.values())
-        self.compiled_pattern = re.compile(self.token_pattern)
-        
-        # Sentence boundary patterns for Gujarati
-        self.sentence_pattern = re.compile(r'[।॥.!?]+\s*')
+        # Instance attributes alias the module-level tables so existing
+        # callers keep working; nothing is compiled per instance.
+        self.gujarati_char_pattern = GUJARATI_CHAR_PATTERN
+        self.patterns = TOKEN_PATTERNS
+        self.token_pattern = _TOKEN_PATTERN
+        self.compiled_pattern = _COMPILED_TOKEN_PATTERN
+        self._group_to_type = _GROUP_TO_TYPE
+        self._classify_order = _CLASSIFY_ORDER
+        self._classify_compiled = _CLASSIFY_COMPILED
+        self._punct_set = _PUNCT_SET
+        self._ascii_class = _ASCII_CLASS
+        self._common_tlds = _COMMON_TLDS
+        self.sentence_pattern = _SENTENCE_PATTERN
+        self._sentence_terminators = _SENTENCE_TERMINATORS
+
+        # Token frequencies are Zipfian, so a handful of tokens account for
+        # most classify_token calls; memoize per instance to skip the regex
+        # walk on repeats.
+        self._classify_cached = lru_cache(maxsize=131072)(self._classify_uncached)
     
     def sentence_tokenize(self, text):
         """Tokenize text into sentences"""
-        # Split on Gujarati sentence terminators (।, ॥) and common punctuation
-        sentences = self.sentence_pattern.split(text.strip())
-        # Remove empty sentences and strip whitespace
-        sentences = [s.strip() for s in sentences if s.strip()]
+        # Walk Gujarati sentence terminators (।, ॥) and common punctuation
+        # with finditer and slice between them, rather than split() building
+        # intermediate pieces that need a second strip/filter pass
+        sentences = []
+        last = 0
+        for match in self.sentence_pattern.finditer(text):
+            sentence = text[last:match.start()].strip()
+            last = match.end()
+            if sentence:
+                sentences.append(sentence)
+        tail = text[last:].strip()
+        if tail:
+            sentences.append(tail)
         return sentences
     
     def word_tokenize(self, text):
         """Tokenize text into words and other tokens"""
-        tokens = []
-        matches = self.compiled_pattern.findall(text)
-        
-        for match in matches:
-            # Find the non-empty group in the match tuple
-            token = next(group for group in match if group)
-            
-            # Skip pure whitespace tokens
-            if not re.match(r'^\s+$', token):
-                tokens.append(token)
-        
-        return tokens
+        # finditer gives the matched span directly, with no per-match group
+        # tuple to scan for the non-empty entry
+        return [m.group() for m in self.compiled_pattern.finditer(text)
+                if not m.group().isspace()]
     
+    def tokenize_and_classify(self, text):
+        """Tokenize text, yielding (token, type) pairs in a single pass.
+
+        The capturing group that matched tells us the token type directly,
+        so no per-token classification regexes are needed.
+        """
+        for match in self.compiled_pattern.finditer(text):
+            token_type = self._group_to_type[match.lastindex - 1]
+            if token_type == 'whitespace':
+                continue
+            token = match.group()
+            if token_type == 'number':
+                token_type = 'decimal_number' if '.' in token else 'integer'
+            yield (token, token_type)
+
+    def _classify_uncached(self, token):
+        # Single characters never need the regex walk: ASCII resolves from
+        # the class table, the rest from the punctuation set, a digit check
+        # or the Gujarati block range.
+        if len(token) == 1:
+            code = ord(token)
+            if code < 128:
+                return self._ascii_class[code]
+            if token in self._punct_set:
+                return 'punctuation'
+            # Gujarati digits \u0AE6-\u0AEF (U+0AE6-0AEF) sit inside the Gujarati
+            # block but match \d, so test them before the range check.
+            if token.isdigit():
+                return 'integer'
+            if '\u0A80' <= token <= '\u0AFF':
+                return 'gujarati_word'
+        for name in self._classify_order:
+            if self._classify_compiled[name].fullmatch(token):
+                if name == 'number':
+                    return 'decimal_number' if '.' in token else 'integer'
+                return name
+        if '.' in token and token.rsplit('.', 1)[-1].lower() in self._common_tlds:
+            return 'url'
+        return 'other'
+
     def classify_token(self, token):
         """Classify a token into its type"""
-        if re.match(self.patterns['email'], token):
-            return 'email'
-        elif re.match(self.patterns['url'], token):
-            return 'url'
-        elif re.match(self.patterns['decimal_number'], token):
-            return 'decimal_number'
-        elif re.match(self.patterns['date'], token):
-            return 'date'
-        elif re.match(self.patterns['integer'], token):
-            return 'integer'
-        elif re.match(self.patterns['punctuation'], token):
-            return 'punctuation'
-        elif re.match(self.patterns['gujarati_word'], token):
-            return 'gujarati_word'
-        elif re.match(self.patterns['english_word'], token):
-            return 'english_word'
-        else:
-            return 'other'
+        return self._classify_cached(token)
     
     def tokenize_paragraph(self, paragraph):
-        """Tokenize a paragraph into sentences and words"""
-        sentences = self.sentence_tokenize(paragraph)
+        """Tokenize a paragraph into sentences and words in a single pass.
+
+        The paragraph is NFC-normalized first so decomposed matra/nukta
+        sequences collapse into the composed codepoints the Gujarati
+        pattern expects. Sentences are flushed whenever a terminator
+        token (।, ॥, ., !, ?) is matched, so the text is scanned once
+        instead of being split into sentences and rescanned per sentence.
+        """
+        paragraph = unicodedata.normalize('NFC', paragraph)
         result = {
             'original_text': paragraph,
             'sentences': [],
             'total_words': 0,
             'total_characters': len(paragraph)
         }
-        
-        for sentence in sentences:
-            words = self.word_tokenize(sentence)
-            classified_words = [(word, self.classify_token(word)) for word in words]
-            
-            result['sentences'].append({
-                'text': sentence,
-                'words': words,
-                'classified_words': classified_words,
-                'word_count': len(words)
-            })
-            result['total_words'] += len(words)
-        
+
+        tokens = []
+        sentence_start = 0
+
+        # Hoist attribute lookups out of the per-match loop; its fixed cost
+        # dominates on multi-million-token corpora.
+        group_to_type = self._group_to_type
+        terminators = self._sentence_terminators
+        sentences = result['sentences']
+        append_token = tokens.append
+
+        for match in self.compiled_pattern.finditer(paragraph):
+            token_type = group_to_type[match.lastindex - 1]
+            if token_type == 'whitespace':
+                continue
+            token = match.group()
+            if token_type == 'number':
+                token_type = 'decimal_number' if '.' in token else 'integer'
+
+            # Sentence boundary: flush the tokens collected so far. The
+            # terminator itself is dropped, as sentence_tokenize did.
+            if token_type == 'punctuation' and token in terminators:
+                if tokens:
+                    sentences.append(Sentence(
+                        text=paragraph[sentence_start:match.start()].strip(),
+                        tokens=tokens))
+                    result['total_words'] += len(tokens)
+                    tokens = []
+                    append_token = tokens.append
+                sentence_start = match.end()
+                continue
+
+            append_token(Token(token, token_type))
+
+        if tokens:
+            result['sentences'].append(Sentence(
+                text=paragraph[sentence_start:].strip(),
+                tokens=tokens))
+            result['total_words'] += len(tokens)
+
         return result
 
+# One tokenizer per process, built lazily so the patterns (and their
+# classification cache) are compiled once per process lifetime — including
+# once per map worker.
+_TOKENIZER = None
+
+def get_tokenizer():
+    """Return the shared per-process GujaratiTokenizer, creating it lazily"""
+    global _TOKENIZER
+    if _TOKENIZER is None:
+        _TOKENIZER = GujaratiTokenizer()
+    return _TOKENIZER
+
+def _tokenize_batch(batch):
+    """Tokenize a batch of examples (runs inside each map worker)"""
+    tokenizer = get_tokenizer()
+    documents = [tokenizer.tokenize_paragraph(text)
+                 for text in batch['text'] if text.strip()]
+    # Arrow storage needs plain structures; process_dataset revives the
+    # dataclasses on the consumer side.
+    for document in documents:
+        document['sentences'] = [asdict(sentence)
+                                 for sentence in document['sentences']]
+    return {'tokenized': documents}
+
 def process_dataset(dataset, max_examples=1000):
-    """Process the dataset and extract tokenized data"""
-    tokenizer = GujaratiTokenizer()
-    processed_data = []
-    
+    """Process the dataset, yielding one tokenized document at a time"""
     print(f"Processing up to {max_examples} examples...")
-    
+
+    # Materialized datasets can fan the regex work out across all cores;
+    # streamed (iterable) datasets fall back to the serial loop below.
+    if hasattr(dataset, 'select') and hasattr(dataset, '__len__'):
+        subset = dataset.select(range(min(max_examples, len(dataset))))
+        tokenized = subset.map(
+            _tokenize_batch,
+            batched=True,
+            batch_size=1000,
+            num_proc=os.cpu_count(),
+            remove_columns=subset.column_names,
+        )
+        for document in tokenized['tokenized']:
+            document['sentences'] = [
+                Sentence(text=sentence['text'],
+                         tokens=[Token(t['text'], t['type'])
+                                 for t in sentence['tokens']])
+                for sentence in document['sentences']
+            ]
+            yield document
+        print(f"Completed processing {len(tokenized)} examples")
+        return
+
+    tokenizer = get_tokenizer()
+    processed = 0
+
     for i, example in enumerate(dataset):
         if i >= max_examples:
             break
-            
+
         if i % 100 == 0:
             print(f"Processed {i} examples...")
-        
+
         # Get the text content
         text = example.get('text', '')
         if not text.strip():
             continue
-            
+
         # Tokenize the paragraph
-        tokenized = tokenizer.tokenize_paragraph(text)
-        processed_data.append(tokenized)
-    
-    print(f"Completed processing {len(processed_data)} examples")
-    return processed_data
+        yield tokenizer.tokenize_paragraph(text)
+        processed += 1
+
+    print(f"Completed processing {processed} examples")
 
 def save_tokenized_data(data, base_filename='gujarati_tokenized'):
-    """Save tokenized data in multiple formats"""
-    
-    # Save as JSON (human readable)
-    with open(f'{base_filename}.json', 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    
+    """Save tokenized data as JSONL, computing statistics in the same pass.
+
+    Documents are written one per line as they arrive, so a generator from
+    process_dataset streams straight to disk without the corpus ever being
+    held in memory. Returns the statistics dict.
+    """
+    jsonl_path = f'{base_filename}.jsonl'
+
+    def write_and_pass_through(documents, f):
+        for document in documents:
+            f.write(orjson.dumps(document, option=orjson.OPT_APPEND_NEWLINE))
+            yield document
+
+    with open(jsonl_path, 'wb') as f:
+        stats = compute_corpus_statistics(write_and_pass_through(data, f))
+
     # Save summary statistics as text
-    stats = compute_corpus_statistics(data)
     with open(f'{base_filename}_stats.txt', 'w', encoding='utf-8') as f:
         for key, value in stats.items():
             f.write(f"{key}: {value}\n")
-    
+
     print(f"Data saved as:")
-    print(f"- {base_filename}.json (JSON format)")
-    print(f"- {base_filename}.pkl (Pickle format)")  
+    print(f"- {jsonl_path} (JSONL format, one document per line)")
     print(f"- {base_filename}_stats.txt (Statistics)")
+    return stats
 
 def compute_corpus_statistics(processed_data):
     """Compute corpus statistics"""
     total_sentences = 0
     total_words = 0
     total_characters = 0
-    all_words = []
-    
+    # Word counts instead of a flat word list: memory stays proportional to
+    # the vocabulary, not the corpus size.
+    word_counts = Counter()
+
     for document in processed_data:
         total_characters += document['total_characters']
-        
+
         for sentence in document['sentences']:
             total_sentences += 1
-            sentence_words = sentence['words']
+            sentence_words = sentence.words
             total_words += len(sentence_words)
-            all_words.extend(sentence_words)
-    
+            word_counts.update(sentence_words)
+
     # Calculate statistics
     avg_sentence_length = total_words / total_sentences if total_sentences > 0 else 0
-    
+
     # Calculate average word length (in characters)
-    total_word_chars = sum(len(word) for word in all_words)
+    total_word_chars = sum(len(word) * count for word, count in word_counts.items())
     avg_word_length = total_word_chars / total_words if total_words > 0 else 0
-    
+
     # Calculate Type-Token Ratio (TTR)
-    unique_words = set(all_words)
-    ttr = len(unique_words) / total_words if total_words > 0 else 0
-    
+    ttr = len(word_counts) / total_words if total_words > 0 else 0
+
     statistics = {
         'Total number of sentences': total_sentences,
         'Total number of words': total_words,
@@ -181,7 +391,7 @@ def compute_corpus_statistics(processed_data):
         'Average sentence length (words per sentence)': round(avg_sentence_length, 2),
         'Average word length (characters per word)': round(avg_word_length, 2),
         'Type-Token Ratio (TTR)': round(ttr, 4),
-        'Total unique words': len(unique_words)
+        'Total unique words': len(word_counts)
     }
     
     return statistics
@@ -193,24 +403,21 @@ def compute_corpus_statistics(processed_data):
 #     print("Loading Gujarati dataset...")
 #     dataset = load_dataset("ai4bharat/IndicCorpV2", "indiccorp_v2", split="guj_Gujr", streaming=True)
     
-#     # Step 2: Process and tokenize the data
+#     # Step 2: Process and tokenize the data (lazily, one document at a time)
 #     processed_data = process_dataset(dataset, max_examples=1000)  # Adjust max_examples as needed
-    
-#     # Step 3: Save the tokenized data
+
+#     # Step 3: Stream the tokenized data to disk; statistics are computed
+#     # in the same pass
 #     print("Saving tokenized data...")
-#     save_tokenized_data(processed_data)
-    
-#     # Step 4: Compute and display statistics
-#     print("\nComputing corpus statistics...")
-#     stats = compute_corpus_statistics(processed_data)
-    
+#     stats = save_tokenized_data(processed_data)
+
 #     print("\n" + "="*50)
 #     print("CORPUS STATISTICS")
 #     print("="*50)
 #     for key, value in stats.items():
 #         print(f"{key}: {value}")
     
-#     return processed_data, stats
+#     return stats
 
 # # Example usage and testing
 # if __name__ == "__main__":